@@ -1,11 +1,14 @@
 from flask import Flask, render_template, session
 from kkoala.models import User
 from dotenv import load_dotenv
+from sqlalchemy import event
+from itsdangerous import URLSafeTimedSerializer
+from jinja2 import FileSystemBytecodeCache
 import resend
 
 from .routes import register_blueprints
-from .extensions import db, bcrypt, migrate
-from .utils import make_csrf_token
+from .extensions import db, bcrypt, migrate, set_sqlite_pragmas
+from .utils import make_csrf_token, get_current_user, ORJSONProvider
 
 load_dotenv()
 
@@ -19,6 +22,13 @@ def create_app(config_class="config.ProdConfig"):
     app = Flask(__name__, static_folder="static", template_folder="templates")
     # Load configuration from the given config class
     app.config.from_object(config_class)
+    # Use orjson for jsonify() and request JSON parsing
+    app.json = ORJSONProvider(app)
+    # Keep compiled templates on disk so fresh workers skip parsing/compiling them
+    # (pages can't be cached as HTML: they embed the CSRF token and dark mode)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(
+        app.config.get("JINJA_BYTECODE_CACHE_DIR")
+    )
 
     # Initialize Flask extensions with the app
     db.init_app(app)
@@ -30,6 +40,9 @@ def create_app(config_class="config.ProdConfig"):
     if resend_key:
         resend.api_key = resend_key
 
+    # Build the password-reset token serializer once; it is stateless and thread-safe
+    app.extensions["reset_serializer"] = URLSafeTimedSerializer(app.secret_key)
+
     # Register a CSRF token generator to run before each request
     app.before_request(make_csrf_token)
 
@@ -60,23 +73,22 @@ def create_app(config_class="config.ProdConfig"):
         Defaults to 'system' if the user is not logged in or has no setting.
         """
         dark_mode = 'system'  # Default value
-        if 'username' in session:
-            user = User.query.filter_by(username=session['username']).first()
-            if user and user.settings:
-                dark_mode = user.settings.dark_mode
+        user = get_current_user()
+        if user and user.settings:
+            dark_mode = user.settings.dark_mode
         return dict(dark_mode_setting=dark_mode)
 
+    # For SQLite: enforce foreign keys and enable WAL journaling.
+    # These PRAGMAs must be set for every new connection, so they are applied
+    # by a "connect" listener (registered before any connection is opened)
+    if app.config.get("SQLALCHEMY_DATABASE_URI", "").startswith("sqlite"):
+        with app.app_context():
+            event.listen(db.engine, "connect", set_sqlite_pragmas)
+
     # Optionally create all database tables if CREATE_DB is set in config
     if app.config.get("CREATE_DB"):
         with app.app_context():
             db.create_all()
 
-    # For SQLite: ensure foreign key constraints are enforced
-    # This PRAGMA must be set for every new connection
-    if app.config.get("SQLALCHEMY_DATABASE_URI", "").startswith("sqlite"):
-        with app.app_context():
-            with db.engine.connect() as connection:
-                connection.execute(db.text("PRAGMA foreign_keys=ON"))
-
     # Return the configured Flask app instance
     return app
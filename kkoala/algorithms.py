@@ -1,14 +1,113 @@
 # Import standard libraries for date and time handling
+from bisect import bisect_left, insort
+from collections import defaultdict
+from operator import itemgetter
 from datetime import datetime, timedelta, time as dtime, timezone
 from zoneinfo import ZoneInfo
 
 # Import utility functions and extensions from the application
 from .utils import to_dt, to_iso, free_slots
+from .consts import DAY_START
 from .extensions import db
-from .models import Settings, Event
+from .models import Event
 
 
-def learning_time_algorithm(events, user):
+def _pick_slot(slots, needed_hours, min_hours):
+    """
+    Choose the free slot to place a learning block in.
+
+    Takes the earliest free slot that fits a minimum-length session (slots come
+    ordered by start from free_slots, so this is a single early-exit scan) and
+    clamps the block length to the hours still needed.
+
+    Args:
+        slots (list): List of (start_datetime, end_datetime) free slot tuples.
+        needed_hours (float): Maximum number of hours to allocate.
+        min_hours (float): Minimum block length in hours.
+
+    Returns:
+        tuple: (slot_start, hours) of the block to create, or None if no slot fits.
+    """
+    if needed_hours < min_hours:
+        return None
+    for slot_start, slot_end in slots:
+        slot_duration = (slot_end - slot_start).total_seconds() / 3600
+        if slot_duration >= min_hours:
+            return slot_start, min(slot_duration, needed_hours)
+    return None
+
+
+def _parse_time_of_day(value):
+    """
+    Parse a stored time of day such as the preferred learning time.
+
+    time.fromisoformat is a fast C-level parse and also accepts the HH:MM:SS
+    values <input type=time> can submit; older rows may hold a one-digit hour
+    ("9:00"), which only strptime accepts.
+
+    Args:
+        value (str): The time in HH:MM (or H:MM, HH:MM:SS) format.
+
+    Returns:
+        time: The parsed time of day.
+
+    Raises:
+        ValueError: If the value is not a valid time.
+    """
+    try:
+        return dtime.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, "%H:%M").time()
+
+
+def history_cutoff(now):
+    """
+    First date whose events still matter to the scheduler, as an ISO date string.
+
+    Events that ended before it are only relevant as past study blocks of an
+    exam. ISO strings sort chronologically, so a plain string comparison with
+    the cutoff works both in SQL and on loaded events.
+
+    Args:
+        now (datetime): The current time (UTC).
+
+    Returns:
+        str: The cutoff date in YYYY-MM-DD format.
+    """
+    return (now - timedelta(days=1)).date().isoformat()
+
+
+def load_schedulable_events(user, now):
+    """
+    Load only the events learning_time_algorithm can use for a user.
+
+    The history filter runs in SQL, so years of past classes and exams are
+    never fetched or turned into ORM objects. Study blocks (events with an
+    exam_id) are always loaded: past ones count towards their exam's hours,
+    and unlocked ones are replaced by the run.
+
+    Args:
+        user (User): The user to schedule for.
+        now (datetime): The run's current time (UTC), also passed to
+            learning_time_algorithm so both use the same cutoff.
+
+    Returns:
+        list: Event objects to pass to learning_time_algorithm.
+    """
+    cutoff = history_cutoff(now)
+    return db.session.scalars(
+        db.select(Event).where(
+            Event.user_id == user.id,
+            db.or_(
+                Event.exam_id.is_not(None),
+                Event.start >= cutoff,
+                Event.end >= cutoff,
+            ),
+        )
+    ).all()
+
+
+def learning_time_algorithm(events, user, now=None):
     """
     Core algorithm to schedule optimal learning blocks for upcoming exams.
 
@@ -19,8 +118,11 @@ def learning_time_algorithm(events, user):
     - Commits all changes in a single database transaction.
 
     Args:
-        events (list): List of all Event objects for the user (including exams and existing learning blocks).
+        events (list): The user's Event objects (including exams and existing learning
+            blocks); see load_schedulable_events for the subset that is needed.
         user (User): The user object for whom the scheduling is performed.
+        now (datetime, optional): The run's current time (UTC); read from the
+            clock if not given. Every date decision of the run derives from it.
 
     Returns:
         tuple: (summary dict, successes dict)
@@ -29,8 +131,8 @@ def learning_time_algorithm(events, user):
     """
 
     # --- Configuration and Initialization ---
-    # Load user settings from the database
-    settings = Settings.query.filter_by(user_id=user.id).first()
+    # Load user settings (cached on the request's user object)
+    settings = user.settings
     if not settings:
         # No settings found for user; return empty results
         return {}, {}
@@ -43,27 +145,36 @@ def learning_time_algorithm(events, user):
     settings_dict = {
         "sat_learn": settings.learn_on_saturday,
         "sun_learn": settings.learn_on_sunday,
-        "preferred_time": datetime.strptime(
-            settings.preferred_learning_time, "%H:%M"
-        ).time(),
+        "preferred_time": _parse_time_of_day(settings.preferred_learning_time),
         "study_block_color": settings.study_block_color or "#0000FF",
         "DAY_END": dtime(22, 0),
         "SESSION": 0.5,  # Minimum session length in hours
         "user_tz": ZoneInfo("Europe/Zurich"),  # User's timezone
     }
 
-    # Filter out past exams and sort remaining exams by priority and date
-    now = datetime.now(timezone.utc)
-    exams = sorted(
-        [
-            e
-            for e in events
-            if int(e.priority) > 0 
-            and int(e.priority) <= max_exam_priority
-            and to_dt(e.start) > now  # Only include future exams
-        ],
-        key=lambda e: (int(e.priority), to_dt(e.start)),
-    )
+    # Parse every event's start/end exactly once; all later checks reuse these datetimes.
+    # Events that ended before yesterday only matter as past study blocks of an exam,
+    # so everything else is skipped with a cheap ISO date-prefix comparison (no parse).
+    if now is None:
+        now = datetime.now(timezone.utc)
+    cutoff = history_cutoff(now)
+    parsed_events = [
+        (to_dt(e.start), to_dt(e.end), e)
+        for e in events
+        if e.exam_id is not None or (e.end or e.start)[:10] >= cutoff
+    ]
+
+    # Filter out past exams and sort remaining exams by priority and date.
+    # The sort key (priority, start) is decorated onto each entry once, so the
+    # sort compares plain tuples instead of re-deriving it per comparison.
+    exams = [
+        (prio, start, e)
+        for prio, start, e in (
+            (int(e.priority), start, e) for start, _, e in parsed_events
+        )
+        if 0 < prio <= max_exam_priority and start > now  # Only future exams
+    ]
+    exams.sort(key=itemgetter(0, 1))
 
     # --- GLOBAL CLEANUP PHASE ---
     # Find all non-locked learning blocks created by the algorithm (to be replaced)
@@ -73,20 +184,101 @@ def learning_time_algorithm(events, user):
         if not event.locked and event.title.startswith("Learning for")
     ]
 
-    # Stage all recyclable blocks for deletion
+    # Delete all recyclable blocks with a single DELETE statement
     if all_recyclable_blocks:
-        for block in all_recyclable_blocks:
-            db.session.delete(block)
+        db.session.execute(
+            db.delete(Event)
+            .where(Event.id.in_([block.id for block in all_recyclable_blocks]))
+            .execution_options(synchronize_session=False)
+        )
 
-    # Prepare a clean list of events for scheduling (locked/user-created only)
-    events_for_scheduling = [e for e in events if e not in all_recyclable_blocks]
+    # --- Event Index ---
+    # Bucket the remaining (locked/user-created) events by start date and by exam,
+    # so each day/exam lookup below only touches the relevant events.
+    # Each day's bucket is kept sorted by start time.
+    events_by_date = defaultdict(list)
+    blocks_by_exam = defaultdict(list)
+    exam_day_hours = defaultdict(float)  # (exam_id, date) -> hours already booked
+    blocked_dates = set()  # Dates covered by an all-day event
+
+    def index_event(start, end, event):
+        entry = (start, end, event)
+        insort(events_by_date[start.date()], entry, key=itemgetter(0))
+        if event.exam_id is not None:
+            blocks_by_exam[event.exam_id].append(entry)
+            if end:
+                exam_day_hours[(event.exam_id, start.date())] += (
+                    end - start
+                ).total_seconds() / 3600
+        if event.all_day:
+            last_day = end.date() - timedelta(days=1) if end else start.date()
+            day = start.date()
+            while day <= last_day:
+                blocked_dates.add(day)
+                day += timedelta(days=1)
+
+    recyclable = set(all_recyclable_blocks)
+    for start, end, event in parsed_events:
+        if event not in recyclable:
+            index_event(start, end, event)
 
     summary = {"exams_processed": 0, "blocks_added": 0, "hours_added": 0.0}
+    new_blocks = []  # Added to the session in one go before the commit
+
+    # Per-run invariants of the day loop: weekdays the user doesn't learn on, and
+    # each date's UTC bounds (computed once per date, shared by all exams)
+    skip_weekdays = {
+        weekday
+        for weekday, allowed in (
+            (5, settings_dict["sat_learn"]),
+            (6, settings_dict["sun_learn"]),
+        )
+        if not allowed
+    }
+    day_bounds = {}
+    min_session = settings_dict["SESSION"]
+    buffer = timedelta(minutes=30)  # Gap kept around existing events
+
+    def bounds_for(day):
+        # (preferred_start, day_start, day_end) in UTC for a local calendar date
+        if day not in day_bounds:
+            tz = settings_dict["user_tz"]
+            day_bounds[day] = tuple(
+                datetime.combine(day, t).replace(tzinfo=tz).astimezone(timezone.utc)
+                for t in (
+                    settings_dict["preferred_time"],
+                    DAY_START,
+                    settings_dict["DAY_END"],
+                )
+            )
+        return day_bounds[day]
+
+    def place_block(exam, start, end, hours):
+        # Create a learning block for the exam and record it in the index/summary
+        new_block = Event(
+            title=f"Learning for {exam.title}",
+            start=to_iso(start),  # UTC
+            end=to_iso(end),      # UTC
+            color=settings_dict["study_block_color"],
+            user_id=exam.user_id,
+            exam_id=exam.id,
+            priority=0,
+            locked=False,
+            recurrence="None",
+            recurrence_id="0",
+            all_day=False,
+        )
+        new_blocks.append(new_block)
+        index_event(start, end, new_block)
+        summary["blocks_added"] += 1
+        summary["hours_added"] += hours
+
+    # Server-local calendar date, taken from the run's single clock reading
+    today = now.astimezone().date()
     successes = {}
 
     # --- Main Exam Loop ---
-    for exam in exams:
-        prio = int(exam.priority)
+    for prio, exam_start, exam in exams:
         prio_setting = priority_settings.get(prio)
         if not prio_setting:
             continue  # Skip if no settings for this priority
@@ -94,26 +286,17 @@ def learning_time_algorithm(events, user):
         summary["exams_processed"] += 1
         total = prio_setting.total_hours_to_learn
         max_per_day = prio_setting.max_hours_per_day
-        window_end = to_dt(exam.start)
+        window_end = exam_start
 
         # Calculate hours already done from past or locked blocks
-        exam_blocks = [e for e in events_for_scheduling if e.exam_id == exam.id]
-        past_blocks = [
-            b for b in exam_blocks if to_dt(b.start) < now
-        ]
-        locked_future_blocks = [
-            b
-            for b in exam_blocks
-            if to_dt(b.start) >= now and b.locked
-        ]
-
-        hours_done = sum(
-            (to_dt(b.end) - to_dt(b.start)).total_seconds() / 3600 for b in past_blocks
-        )
-        hours_scheduled_locked = sum(
-            (to_dt(b.end) - to_dt(b.start)).total_seconds() / 3600
-            for b in locked_future_blocks
-        )
+        # (one pass over the exam's blocks for both totals)
+        hours_done = 0.0
+        hours_scheduled_locked = 0.0
+        for start, end, block in blocks_by_exam[exam.id]:
+            if start < now:
+                hours_done += (end - start).total_seconds() / 3600
+            elif block.locked:
+                hours_scheduled_locked += (end - start).total_seconds() / 3600
         hours_left = max(0, total - hours_done - hours_scheduled_locked)
 
         if hours_left <= 0:
@@ -123,68 +306,43 @@ def learning_time_algorithm(events, user):
 
         # --- Scheduling Loop ---
         new_scheduled = 0.0
-        days_left_until_exam = (window_end.date() - datetime.now().date()).days
+        days_left_until_exam = (window_end.date() - today).days
 
         # Try to schedule learning blocks on each day before the exam
         for day_offset in range(1, min(22, days_left_until_exam + 1)):
             if new_scheduled >= hours_left:
                 break
-            current_day = window_end - timedelta(days=day_offset)
+            day = (window_end - timedelta(days=day_offset)).date()
 
-            # Skip if current_day is in the past
-            if current_day.date() < datetime.now().date():
+            # Skip if the day is in the past
+            if day < today:
                 continue
 
             # --- Day Pre-Checks ---
             # Skip if the day is blocked by an all-day event
-            is_day_blocked = any(
-                e.all_day
-                and to_dt(e.start).date()
-                <= current_day.date()
-                <= (
-                    to_dt(e.end).date() - timedelta(days=1)
-                    if e.end
-                    else to_dt(e.start).date()
-                )
-                for e in events_for_scheduling
-            )
-            if is_day_blocked:
+            if day in blocked_dates:
                 continue
             # Skip if learning on this day is not allowed by user settings
-            if (not settings_dict["sat_learn"] and current_day.weekday() == 5) or (
-                not settings_dict["sun_learn"] and current_day.weekday() == 6
-            ):
+            if day.weekday() in skip_weekdays:
                 continue
 
-            # Calculate how many hours are already scheduled for this exam on this day
-            scheduled_today_for_exam = sum(
-                (to_dt(b.end) - to_dt(b.start)).total_seconds() / 3600
-                for b in events_for_scheduling
-                if b.exam_id == exam.id and to_dt(b.start).date() == current_day.date()
-            )
+            day_events = events_by_date.get(day, ())
+
+            # Hours already scheduled for this exam on this day
+            scheduled_today_for_exam = exam_day_hours.get((exam.id, day), 0.0)
             today_max = min(
                 max_per_day - scheduled_today_for_exam, hours_left - new_scheduled
             )
 
-            if today_max < settings_dict["SESSION"]:
+            if today_max < min_session:
                 continue
 
             # --- Preferred Slot Check ---
-            # Try to schedule at the user's preferred learning time
-            naive_preferred_start = datetime.combine(
-                current_day.date(), settings_dict["preferred_time"]
-            )
-            # Localize to user timezone, then convert to UTC
-            local_preferred_start = naive_preferred_start.replace(tzinfo=settings_dict["user_tz"])
-            preferred_start = local_preferred_start.astimezone(timezone.utc)
+            # Try to schedule at the user's preferred learning time (local time
+            # converted to UTC, like the usable day bounds)
+            preferred_start, day_start_utc, day_end_utc = bounds_for(day)
             preferred_end = preferred_start + timedelta(hours=today_max)
 
-            naive_day_end = datetime.combine(
-                current_day.date(), settings_dict["DAY_END"]
-            )
-            local_day_end = naive_day_end.replace(tzinfo=settings_dict["user_tz"])
-            day_end_utc = local_day_end.astimezone(timezone.utc)
-
             if preferred_end > day_end_utc:
                 preferred_end = day_end_utc
 
@@ -192,19 +350,17 @@ def learning_time_algorithm(events, user):
                 preferred_end - preferred_start
             ).total_seconds() / 3600
             is_preferred_slot_free = True
-            if preferred_slot_duration >= settings_dict["SESSION"]:
-                for event in events_for_scheduling:
-                    if to_dt(event.start).date() != current_day.date():
-                        continue
-                    
+            if preferred_slot_duration >= min_session:
+                # Only events starting before the (buffered) slot end can overlap it
+                last = bisect_left(day_events, preferred_end + buffer, key=itemgetter(0))
+                for event_start, event_end, _ in day_events[:last]:
                     # Handle events without end times
-                    event_start = to_dt(event.start)
-                    event_end = to_dt(event.end) if event.end else event_start
-                    
+                    event_end = event_end or event_start
+
                     # Check for overlap (with 30 min buffer)
                     if not (
-                        preferred_end <= event_start - timedelta(minutes=30)
-                        or preferred_start >= event_end + timedelta(minutes=30)
+                        preferred_end <= event_start - buffer
+                        or preferred_start >= event_end + buffer
                     ):
                         is_preferred_slot_free = False
                         break
@@ -213,54 +369,24 @@ def learning_time_algorithm(events, user):
 
             if is_preferred_slot_free:
                 # Schedule a new learning block at the preferred time
-                new_block = Event(
-                    title=f"Learning for {exam.title}",
-                    start=to_iso(preferred_start),  # UTC
-                    end=to_iso(preferred_end),      # UTC
-                    color=settings_dict["study_block_color"],
-                    user_id=exam.user_id,
-                    exam_id=exam.id,
-                    priority=0,
-                    locked=False,
-                    recurrence="None",
-                    recurrence_id="0",
-                    all_day=False,
-                )
-                db.session.add(new_block)  # Stage for addition
-                events_for_scheduling.append(new_block)
+                place_block(exam, preferred_start, preferred_end, preferred_slot_duration)
                 new_scheduled += preferred_slot_duration
-                summary["blocks_added"] += 1
-                summary["hours_added"] += preferred_slot_duration
                 continue
 
             # --- General Free Slot Search ---
             # If preferred slot is not available, find any free slot that fits
-            slots = free_slots(events_for_scheduling, current_day.date())
-            slots.sort(key=lambda s: s[1] - s[0], reverse=True)
-            if slots:
-                slot_start, slot_end = slots[0]
-                slot_duration = (slot_end - slot_start).total_seconds() / 3600
-                allocatable = min(slot_duration, hours_left - new_scheduled, today_max)
-                if allocatable >= settings_dict["SESSION"]:
-                    block_end = slot_start + timedelta(hours=allocatable)
-                    new_block = Event(
-                        title=f"Learning for {exam.title}",
-                        start=to_iso(slot_start),   # UTC
-                        end=to_iso(block_end),      # UTC
-                        color=settings_dict["study_block_color"],
-                        user_id=exam.user_id,
-                        exam_id=exam.id,
-                        priority=0,
-                        locked=False,
-                        recurrence="None",
-                        recurrence_id="0",
-                        all_day=False,
-                    )
-                    db.session.add(new_block)  # Stage for addition
-                    events_for_scheduling.append(new_block)
-                    new_scheduled += allocatable
-                    summary["blocks_added"] += 1
-                    summary["hours_added"] += allocatable
+            slots = free_slots(day_events, day_start_utc, day_end_utc)
+            picked = _pick_slot(
+                slots,
+                min(hours_left - new_scheduled, today_max),
+                min_session,
+            )
+            if picked:
+                slot_start, allocatable = picked
+                place_block(
+                    exam, slot_start, slot_start + timedelta(hours=allocatable), allocatable
+                )
+                new_scheduled += allocatable
 
         # --- Final Status Update ---
         total_scheduled = new_scheduled + hours_scheduled_locked
@@ -277,7 +403,8 @@ def learning_time_algorithm(events, user):
             ]
 
     # --- FINAL COMMIT ---
-    # Commit all staged deletions and additions in a single transaction
+    # Insert all new blocks (batched by the flush) and commit in a single transaction
+    db.session.add_all(new_blocks)
     db.session.commit()
 
     return summary, successes
@@ -11,6 +11,10 @@ class BaseConfig:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
     # Keep CREATE_DB False in production
     CREATE_DB = False
+    # bcrypt work factor; tune per deployment so a hash takes ~100 ms
+    BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", "12"))
+    # Directory for compiled Jinja templates (None = system temp dir)
+    JINJA_BYTECODE_CACHE_DIR = os.getenv("JINJA_BYTECODE_CACHE_DIR")
 
 
 class ProdConfig(BaseConfig):
@@ -20,6 +24,18 @@ class ProdConfig(BaseConfig):
         SQLALCHEMY_DATABASE_URI = SQLALCHEMY_DATABASE_URI.replace(
             "postgres://", "postgresql://", 1
         )
+    # Keep warm connections for the gthread workers; ping before use so a
+    # connection dropped by the server doesn't fail the request
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+    }
+    if SQLALCHEMY_DATABASE_URI.startswith(("postgresql://", "postgresql+psycopg2://")):
+        # INSERTs are already batched by insertmanyvalues; also batch the bulk
+        # UPDATE-by-primary-key executemanys (grade book sync, series edits)
+        SQLALCHEMY_ENGINE_OPTIONS["executemany_mode"] = "values_plus_batch"
 
 
 class DevConfig(BaseConfig):
@@ -32,3 +48,5 @@ class TestConfig(BaseConfig):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
     CREATE_DB = True
+    # Minimum bcrypt cost keeps password hashing fast in tests
+    BCRYPT_LOG_ROUNDS = 4
@@ -7,3 +7,25 @@ from flask_migrate import Migrate            # Database schema migrations
 db = SQLAlchemy()    # Handles all database operations and models
 bcrypt = Bcrypt()    # Provides methods for hashing and checking passwords
 migrate = Migrate()  # Manages database migrations (schema changes)
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    SQLAlchemy "connect" listener applying per-connection SQLite settings.
+
+    - foreign_keys: enforce FK constraints (off by default in SQLite). Applies to
+      the Alembic connection too; migrations/env.py switches it off while
+      migrations run, since batch table rebuilds must not be FK-checked.
+    - journal_mode=WAL: readers don't block the writer; one fsync per commit.
+    - synchronous=NORMAL: safe with WAL, skips the extra fsync of FULL.
+    - temp_store=MEMORY / mmap_size: keep temp tables and reads off the disk path.
+    - cache_size: 20 MB page cache per connection (default is ~2 MB).
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    cursor.execute("PRAGMA cache_size=-20000")  # negative = size in KiB
+    cursor.close()
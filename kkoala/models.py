@@ -1,3 +1,5 @@
+import secrets
+
 from .extensions import db
 
 # -------------------------------
@@ -13,6 +15,8 @@ class User(db.Model):
         username (str): Unique username for login.
         password (str): Hashed password.
         email (str): Unique email address.
+        grades_version (int): Random at sign-up, bumped on every grade book save
+            (ETag for /api/noten).
         events (relationship): All calendar events for the user.
         semesters (relationship): All semesters for the user (grades).
         settings (relationship): User's settings (one-to-one).
@@ -22,19 +26,46 @@ class User(db.Model):
     username = db.Column(db.String(100), unique=True, nullable=False)
     password = db.Column(db.String(100), nullable=False)  # Hashed password
     email = db.Column(db.String(100), unique=True, nullable=False)
+    # Starts at a random value: SQLite may reuse a deleted user's id, and the
+    # ETag "<id>-<version>" must not match what a client cached for that account
+    grades_version = db.Column(
+        db.Integer,
+        nullable=False,
+        default=lambda: secrets.randbelow(2**30),
+        server_default="0",
+    )
 
-    # Relationships
+    # Relationships (passive_deletes: the database cascades a user's deletion
+    # through ON DELETE CASCADE foreign keys, so nothing is loaded to delete it)
     events = db.relationship(
-        "Event", backref="user", lazy=True, cascade="all, delete-orphan"
+        "Event",
+        backref="user",
+        lazy=True,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
     semesters = db.relationship(
-        "Semester", backref="user", lazy=True, cascade="all, delete-orphan"
+        "Semester",
+        backref="user",
+        lazy=True,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
+    # Joined: every rendered page reads the settings (dark mode), so load them with the user
     settings = db.relationship(
-        "Settings", backref="user", uselist=False, lazy=True, cascade="all, delete-orphan"
+        "Settings",
+        backref="user",
+        uselist=False,
+        lazy="joined",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
     todo_categories = db.relationship(
-        "ToDoCategory", backref="user", lazy=True, cascade="all, delete-orphan"
+        "ToDoCategory",
+        backref="user",
+        lazy=True,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
 # -------------------------------
@@ -57,7 +88,7 @@ class Settings(db.Model):
         priority_settings (relationship): Priority rules for learning algorithm.
     """
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
     learn_on_saturday = db.Column(db.Boolean, default=False)
     learn_on_sunday = db.Column(db.Boolean, default=False)
     preferred_learning_time = db.Column(db.String(20), default="18:00")
@@ -67,7 +98,12 @@ class Settings(db.Model):
 
     # Priority settings for learning algorithm
     priority_settings = db.relationship(
-        "PrioritySetting", backref="settings", lazy=True, cascade="all, delete-orphan"
+        "PrioritySetting",
+        backref="settings",
+        lazy=True,
+        order_by="PrioritySetting.priority_level",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
 class PrioritySetting(db.Model):
@@ -83,7 +119,7 @@ class PrioritySetting(db.Model):
         total_hours_to_learn (float): Total hours to schedule for this priority.
     """
     id = db.Column(db.Integer, primary_key=True)
-    settings_id = db.Column(db.Integer, db.ForeignKey("settings.id"), nullable=False)
+    settings_id = db.Column(db.Integer, db.ForeignKey("settings.id", ondelete="CASCADE"), nullable=False, index=True)
     priority_level = db.Column(db.Integer, nullable=False)  # e.g., 1, 2, 3
     color = db.Column(db.String(7), nullable=False)
     max_hours_per_day = db.Column(db.Float, nullable=False)
@@ -111,9 +147,18 @@ class Event(db.Model):
         locked (bool): True if user-created (not deleted by algorithm).
         exam_id (int): Links a study block to its parent exam.
     """
+    __table_args__ = (
+        # Covers per-user lookups and per-user recurrence series lookups
+        db.Index("ix_event_user_recurrence", "user_id", "recurrence_id"),
+        # ISO strings sort chronologically, so this serves per-user date range queries
+        db.Index("ix_event_user_start", "user_id", "start"),
+        # Serves the priority shifts in settings and the dashboard's exam lookup
+        db.Index("ix_event_user_priority", "user_id", "priority"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(
-        db.Integer, db.ForeignKey("user.id", onupdate="CASCADE"), nullable=False
+        db.Integer, db.ForeignKey("user.id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False
     )
     title = db.Column(db.String(500), nullable=False)
     start = db.Column(db.String(50), nullable=False)  # ISO format datetime
@@ -141,12 +186,17 @@ class Semester(db.Model):
         subjects (relationship): All subjects in this semester.
     """
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
 
     # Subjects in this semester
     subjects = db.relationship(
-        "Subject", backref="semester", lazy=True, cascade="all, delete-orphan"
+        "Subject",
+        backref="semester",
+        lazy="selectin",
+        order_by="Subject.id",
+        cascade="all, delete-orphan",
+        passive_deletes=True,  # The database cascades the delete (ON DELETE CASCADE)
     )
 
 class Subject(db.Model):
@@ -161,13 +211,18 @@ class Subject(db.Model):
         grades (relationship): All grades for this subject.
     """
     id = db.Column(db.Integer, primary_key=True)
-    semester_id = db.Column(db.Integer, db.ForeignKey("semester.id"), nullable=False)
+    semester_id = db.Column(db.Integer, db.ForeignKey("semester.id", ondelete="CASCADE"), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     counts_towards_average = db.Column(db.Boolean, nullable=False, default=True)
 
     # Grades for this subject
     grades = db.relationship(
-        "Grade", backref="subject", lazy=True, cascade="all, delete-orphan"
+        "Grade",
+        backref="subject",
+        lazy="selectin",
+        order_by="Grade.id",
+        cascade="all, delete-orphan",
+        passive_deletes=True,  # The database cascades the delete (ON DELETE CASCADE)
     )
 
 class Grade(db.Model):
@@ -183,7 +238,7 @@ class Grade(db.Model):
         counts (bool): Whether grade is included in calculation.
     """
     id = db.Column(db.Integer, primary_key=True)
-    subject_id = db.Column(db.Integer, db.ForeignKey("subject.id"), nullable=False)
+    subject_id = db.Column(db.Integer, db.ForeignKey("subject.id", ondelete="CASCADE"), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     value = db.Column(db.Float, nullable=False)
     weight = db.Column(db.Float, nullable=False)
@@ -204,12 +259,16 @@ class ToDoCategory(db.Model):
         items (relationship): All to-do items in this category.
     """
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
 
     # To-do items in this category
     items = db.relationship(
-        "ToDoItem", backref="category", lazy=True, cascade="all, delete-orphan"
+        "ToDoItem",
+        backref="category",
+        lazy=True,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
 class ToDoItem(db.Model):
@@ -223,5 +282,5 @@ class ToDoItem(db.Model):
         completed (bool): Completion status.
     """
     id = db.Column(db.Integer, primary_key=True)
-    category_id = db.Column(db.Integer, db.ForeignKey("to_do_category.id"), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey("to_do_category.id", ondelete="CASCADE"), nullable=False, index=True)
     description = db.Column(db.String(500), nullable=False)
\ No newline at end of file
@@ -17,8 +17,6 @@ from ..models import User, Settings, PrioritySetting
 from ..utils import csrf_protect, login_required
 # Import default settings and email sender address
 from ..consts import DEFAULT_SETTINGS, FROM_EMAIL
-# Import for secure token generation (password reset)
-from itsdangerous import URLSafeTimedSerializer
 # Import for sending emails
 import resend
 import re
@@ -35,7 +33,7 @@ def login():
     Login route: Handles user sign-in and session management.
 
     POST: Authenticates user credentials using bcrypt. If successful, sets the
-          'username' in the session and redirects to home.
+          'username' and 'user_id' in the session and redirects to home.
     GET: Renders the login page.
 
     Returns:
@@ -49,6 +47,7 @@ def login():
         # Check if user exists and password hash matches
         if user and bcrypt.check_password_hash(user.password, password):
             session["username"] = username
+            session["user_id"] = user.id
             return redirect(url_for("main.index"))
         flash("Ungültige Anmeldedaten. Bitte erneut versuchen.", "error")
         return render_template("login.html")
@@ -73,7 +72,7 @@ def forgot_password():
 
         if user:
             # Generate a password reset token, signed with a salt (user's password hash) for security
-            serializer = URLSafeTimedSerializer(current_app.secret_key)
+            serializer = current_app.extensions["reset_serializer"]
             token = serializer.dumps(email, salt=user.password)
             reset_link = url_for("auth.reset_password", token=token, _external=True)
 
@@ -109,7 +108,7 @@ def reset_password(token):
     Returns:
         str: Rendered HTML template ('reset_password.html') or a redirect/error message.
     """
-    serializer = URLSafeTimedSerializer(current_app.secret_key)
+    serializer = current_app.extensions["reset_serializer"]
 
     if request.method == "POST":
         try:
@@ -129,8 +128,10 @@ def reset_password(token):
 
         if request.form["new_password"] == request.form["confirm_password"]:
             new_password = request.form["new_password"]
-            # Find user again by the email verified by the token
-            user = User.query.filter_by(email=email).first()
+            # The token was verified against this user's hash, so reuse the row;
+            # only look the user up by the token's email if it belongs to someone else
+            if user.email != email:
+                user = User.query.filter_by(email=email).first()
             if user:
                 # Hash and update the password
                 hashed_password = bcrypt.generate_password_hash(new_password).decode(
@@ -196,35 +197,31 @@ def register():
         # Hash password and create new user
         hashed_password = bcrypt.generate_password_hash(password).decode("utf-8")
         new_user = User(username=username, password=hashed_password, email=email)
-        db.session.add(new_user)
-        db.session.commit()  # Commit to get new_user.id
 
-        # Create default settings for the new user
-        default_settings = Settings(
-            user_id=new_user.id,
+        # Create default settings and PrioritySetting entries (P1, P2, P3), linked
+        # through relationships so the commit assigns all ids in a single flush
+        new_user.settings = Settings(
             learn_on_saturday=DEFAULT_SETTINGS["learn_on_saturday"],
             learn_on_sunday=DEFAULT_SETTINGS["learn_on_sunday"],
             preferred_learning_time=DEFAULT_SETTINGS["preferred_learning_time"],
             study_block_color=DEFAULT_SETTINGS["study_block_color"],
-        )
-        db.session.add(default_settings)
-        db.session.flush()  # Flush to get default_settings.id
-
-        # Create default PrioritySetting entries (P1, P2, P3)
-        for level in [1, 2, 3]:
-            priority = DEFAULT_SETTINGS["priority_settings"][level]
-            db.session.add(
+            priority_settings=[
                 PrioritySetting(
-                    settings_id=default_settings.id,
                     priority_level=level,
                     color=priority["color"],
                     max_hours_per_day=priority["max_hours_per_day"],
                     total_hours_to_learn=priority["total_hours_to_learn"],
                 )
-            )
+                for level, priority in sorted(
+                    DEFAULT_SETTINGS["priority_settings"].items()
+                )
+            ],
+        )
+        db.session.add(new_user)
         db.session.commit()
 
         session["username"] = username
+        session["user_id"] = new_user.id
         return redirect(url_for("main.index"))
 
     return render_template("register.html")
@@ -239,4 +236,5 @@ def logout(user):
         redirect: Redirects to the home route.
     """
     session.pop("username", None)
+    session.pop("user_id", None)
     return redirect(url_for("main.index"))
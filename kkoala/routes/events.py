@@ -1,20 +1,31 @@
 # Import Flask modules for routing, request handling, and responses
 from flask import Blueprint, request, jsonify, current_app, session, Response
-from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
+from datetime import datetime, timedelta, timezone
 import uuid
 import icalendar
 
 # Import application extensions and models
 from ..extensions import db
 from ..models import Event, User, Settings, PrioritySetting
-from ..utils import csrf_protect, login_required, str_to_bool
-from ..algorithms import learning_time_algorithm
-from ..consts import DEFAULT_IMPORT_COLOR
+from ..utils import (
+    csrf_protect,
+    login_required,
+    str_to_bool,
+    conditional_jsonify,
+    recurrence_step,
+)
+from ..algorithms import learning_time_algorithm, load_schedulable_events
+from ..consts import DEFAULT_IMPORT_COLOR, DEFAULT_SETTINGS
 
 # Define the blueprint for event-related API routes
 events_bp = Blueprint("events", __name__)
 
+# Number of events created for each supported recurrence pattern (about one year)
+RECURRENCE_INSTANCES = {"daily": 365, "weekly": 52, "monthly": 12}
+
+# Maximum number of imported events sent to the database per INSERT batch
+IMPORT_BATCH_SIZE = 5000
+
 @events_bp.route("/", methods=["GET"])
 @login_required
 def get_events(user):
@@ -24,23 +35,47 @@ def get_events(user):
     Returns:
         JSON: List of all user events formatted for the calendar (FullCalendar).
     """
-    user_events = Event.query.filter_by(user_id=user.id).all()
+    # Select plain column tuples; the calendar feed never needs ORM objects, so
+    # skip identity-map registration and attribute instrumentation per row
+    rows = db.session.execute(
+        db.select(
+            Event.id,
+            Event.title,
+            Event.start,
+            Event.end,
+            Event.color,
+            Event.priority,
+            Event.recurrence,
+            Event.recurrence_id,
+            Event.all_day,
+        ).filter_by(user_id=user.id)
+    ).all()
     # Format events into a dictionary list for JSON response
     events = [
         {
-            "id": event.id,
-            "title": event.title,
-            "start": event.start,
-            "end": event.end,
-            "color": event.color,
-            "priority": event.priority,
-            "recurrence": event.recurrence,
-            "recurrence_id": event.recurrence_id,
-            "allDay": event.all_day,
+            "id": event_id,
+            "title": title,
+            "start": start,
+            "end": end,
+            "color": color,
+            "priority": priority,
+            "recurrence": recurrence,
+            "recurrence_id": recurrence_id,
+            "allDay": all_day,
         }
-        for event in user_events
+        for (
+            event_id,
+            title,
+            start,
+            end,
+            color,
+            priority,
+            recurrence,
+            recurrence_id,
+            all_day,
+        ) in rows
     ]
-    return jsonify(events), 200
+    return conditional_jsonify(events)
 
 @events_bp.route("/", methods=["POST"])
 @csrf_protect
@@ -58,10 +93,11 @@ def create_event(user):
     data = request.json
     all_day = str_to_bool(data.get("all_day", False))
     end_str = data.get("end")
+    # Parse the end once; the recurrence branch below reuses the datetime
+    end_dt = datetime.fromisoformat(end_str) if end_str else None
 
     # Adjust end date for all-day events (add one day)
-    if all_day and end_str:
-        end_dt = datetime.fromisoformat(end_str)
+    if all_day and end_dt:
         end_dt += timedelta(days=1)
         end_str = end_dt.isoformat()
 
@@ -78,43 +114,40 @@ def create_event(user):
 
     # Handle recurring events
     if data["recurrence"] != "none":
-        recurrence_id = str(uuid.uuid4().int)  # Generate a unique ID for the series
+        recurrence_id = uuid.uuid4().hex  # Compact (32-char) unique ID for the series
         start_dt = datetime.fromisoformat(data["start"])
-        end_dt = datetime.fromisoformat(end_str) if end_str else None
         duration = end_dt - start_dt if end_dt else None
 
         # Determine number of instances based on recurrence pattern
-        num_instances = (
-            365
-            if data["recurrence"] == "daily"
-            else 52 if data["recurrence"] == "weekly" else 12
-        )
-        for i in range(num_instances):
-            if data["recurrence"] == "daily":
-                offset = timedelta(days=i)
-            elif data["recurrence"] == "weekly":
-                offset = timedelta(weeks=i)
-            elif data["recurrence"] == "monthly":
-                offset = relativedelta(months=i)
-
-            new_start = start_dt + offset
-            new_end = new_start + duration if duration else None
-
-            new_event = Event(
-                title=data["title"],
-                start=new_start.isoformat(),
-                end=new_end.isoformat() if new_end else None,
-                color=data["color"],
-                user_id=user.id,
-                priority=data["priority"],
-                recurrence=data["recurrence"],
-                recurrence_id=recurrence_id,
-                all_day=all_day,
-                locked=True,  # Recurring events are locked by default
-                exam_id=None,
-            )
-            db.session.add(new_event)
-
+        num_instances = RECURRENCE_INSTANCES.get(data["recurrence"])
+        if num_instances is None:
+            return jsonify({"message": "Unsupported recurrence pattern"}), 400
+
+        # Start of every instance; all other columns are shared
+        step = recurrence_step(data["recurrence"])
+        starts = [start_dt + step * i for i in range(num_instances)]
+        shared = {
+            "title": data["title"],
+            "color": data["color"],
+            "user_id": user.id,
+            "priority": int(data["priority"]),
+            "recurrence": data["recurrence"],
+            "recurrence_id": recurrence_id,
+            "all_day": all_day,
+            "locked": True,  # Recurring events are locked by default
+            "exam_id": None,
+        }
+        rows = [
+            {
+                **shared,
+                "start": new_start.isoformat(),
+                "end": (new_start + duration).isoformat() if duration else None,
+            }
+            for new_start in starts
+        ]
+
+        # Insert the whole series with one executemany instead of one ORM object per row
+        db.session.execute(db.insert(Event), rows)
         db.session.commit()
         return jsonify({"message": "Recurring events created"}), 201
 
@@ -152,35 +185,32 @@ def update_event(user):
     data = request.json
     all_day = str_to_bool(data.get("all_day", False))
     end_str = data.get("end")
+    # Parse the end once; the recurrence branch below reuses the datetime
+    end_dt = datetime.fromisoformat(end_str) if end_str else None
 
     # Adjust end date for all-day events (add one day)
-    if all_day and end_str:
-        end_dt = datetime.fromisoformat(end_str)
+    if all_day and end_dt:
         end_dt += timedelta(days=1)
         end_str = end_dt.isoformat()
 
+    # When the whole series is edited, fetch it once: only ids (and the pattern)
+    # are needed, since every instance is rewritten by one bulk UPDATE. The same
+    # list tells whether just one instance is left, which is edited like a
+    # single event, so the series is never queried a second time.
+    series = None
+    if data["edit-recurrence"] == "all":
+        series = db.session.execute(
+            db.select(Event.id, Event.recurrence)
+            .filter_by(recurrence_id=data["recurrence-id"], user_id=user.id)
+            .order_by(Event.id)
+        ).all()
+
     # Case 1: Update a single event (or one that becomes a single event)
-    if (
-        data["edit-recurrence"] != "all"
-        or len(Event.query.filter_by(recurrence_id=data["recurrence-id"]).all()) == 1
-    ):
-        event = Event.query.get(data["id"])
+    if series is None or len(series) == 1:
+        event = db.session.get(Event, data["id"])
         if not event or event.user_id != user.id:
             return jsonify({"message": "Event not found or unauthorized"}), 404
 
-        old_priority = event.priority
-        # Update color if priority has changed (for exam events)
-        if int(data["priority"]) != old_priority:
-            if int(data["priority"]) > 0:
-                prio_setting = (
-                    PrioritySetting.query.join(Settings)
-                    .filter(
-                        Settings.user_id == user.id,
-                        PrioritySetting.priority_level == int(data["priority"]),
-                    )
-                    .first()
-                )
-
         event.title = data["title"]
         event.start = data["start"]
         event.end = end_str
@@ -194,57 +224,49 @@ def update_event(user):
         return jsonify({"message": "Event updated"}), 200
     else:
         # Case 2: Update all events in recurrence series
-        events = Event.query.filter_by(
-            recurrence_id=data["recurrence-id"], user_id=user.id
-        ).all()
-        if not events:
+        if not series:
             return (
                 jsonify({"message": "Recurring events not found or unauthorized"}),
                 404,
             )
 
         new_start_datetime = datetime.fromisoformat(data["start"])
-        new_end_datetime = datetime.fromisoformat(end_str) if end_str else None
-        new_duration = (
-            new_end_datetime - new_start_datetime if new_end_datetime else None
-        )
+        new_duration = end_dt - new_start_datetime if end_dt else None
 
         new_start_time = new_start_datetime.time()
         new_start_date = new_start_datetime.date()
-        recurrence_pattern = events[0].recurrence
-
-        # Iterate over all events in the series and adjust their date/time based on the pattern
-        for i, event in enumerate(events):
-            event.title = data["title"]
-            event.color = data["color"]
-            event.priority = data["priority"]
-            event.all_day = all_day
-            event.locked = True  # Lock recurring events on update
-
-            # Calculate the new start datetime based on the recurrence pattern and index
-            if recurrence_pattern == "daily":
-                updated_start_datetime = datetime.combine(
-                    new_start_date + timedelta(days=i), new_start_time
-                )
-            elif recurrence_pattern == "weekly":
-                updated_start_datetime = datetime.combine(
-                    new_start_date + timedelta(weeks=i), new_start_time
-                )
-            elif recurrence_pattern == "monthly":
-                updated_start_datetime = datetime.combine(
-                    new_start_date + relativedelta(months=i), new_start_time
-                )
-            else:
-                return jsonify({"message": "Unsupported recurrence pattern"}), 400
-
-            event.start = updated_start_datetime.isoformat()
-            # Adjust the end time based on the new duration
-            if new_duration is not None:
-                updated_end_datetime = updated_start_datetime + new_duration
-                event.end = updated_end_datetime.isoformat()
-            else:
-                event.end = None
+        recurrence_pattern = series[0].recurrence
+        step = recurrence_step(recurrence_pattern)
+        if step is None:
+            return jsonify({"message": "Unsupported recurrence pattern"}), 400
+
+        shared = {
+            "title": data["title"],
+            "color": data["color"],
+            "priority": data["priority"],
+            "all_day": all_day,
+            "locked": True,  # Lock recurring events on update
+        }
+        rows = []
+        # Adjust each instance's date/time based on the pattern and its index
+        for i, (event_id, _) in enumerate(series):
+            updated_start_datetime = datetime.combine(
+                new_start_date + step * i,
+                new_start_time,
+            )
+            rows.append(
+                {
+                    **shared,
+                    "id": event_id,
+                    "start": updated_start_datetime.isoformat(),
+                    # Adjust the end time based on the new duration
+                    "end": (updated_start_datetime + new_duration).isoformat()
+                    if new_duration is not None
+                    else None,
+                }
+            )
 
+        db.session.execute(db.update(Event), rows)
         db.session.commit()
         return jsonify({"message": "Recurring events updated"}), 200
 
@@ -261,12 +283,14 @@ def delete_event(user, event_id):
     Returns:
         JSON: Success message and status code 200, or a 404 error.
     """
-    event = Event.query.get(event_id)
-    if event and event.user_id == user.id:
-        db.session.delete(event)
-        db.session.commit()
-        return jsonify({"message": "Event deleted"}), 200
-    return jsonify({"message": "Event not found or unauthorized"}), 404
+    # Single DELETE scoped to the owner; no SELECT to load the event first
+    deleted = Event.query.filter_by(id=event_id, user_id=user.id).delete(
+        synchronize_session=False
+    )
+    if not deleted:
+        return jsonify({"message": "Event not found or unauthorized"}), 404
+    db.session.commit()
+    return jsonify({"message": "Event deleted"}), 200
 
 @events_bp.route("/recurring/<recurrence_id>", methods=["DELETE"])
 @csrf_protect
@@ -281,9 +305,10 @@ def delete_recurring_events(user, recurrence_id):
     Returns:
         JSON: Success message and status code 200.
     """
-    Event.query.filter_by(
-        recurrence_id=recurrence_id, user_id=user.id
-    ).delete()  # Mass delete
+    # Single DELETE for the whole series; nothing in the session needs syncing
+    Event.query.filter_by(recurrence_id=recurrence_id, user_id=user.id).delete(
+        synchronize_session=False
+    )
     db.session.commit()
     return jsonify({"message": "Recurring events deleted"}), 200
 
@@ -294,14 +319,17 @@ def run_learning_algorithm(user):
     """
     Trigger the study scheduling algorithm for the user.
 
-    Fetches all user events, runs the algorithm, and returns the scheduling results.
+    Fetches the user's relevant events, runs the algorithm, and returns the scheduling results.
 
     Returns:
         JSON: Dictionary containing the scheduling summary and results per exam.
     """
     try:
-        events = Event.query.filter_by(user_id=user.id).all()
-        summary, successes = learning_time_algorithm(events, user)
+        # One clock reading for the whole run: the SQL history cutoff and the
+        # algorithm's notion of "now"/"today" must agree
+        now = datetime.now(timezone.utc)
+        events = load_schedulable_events(user, now)
+        summary, successes = learning_time_algorithm(events, user, now)
         return (
             jsonify({"status": "success", "summary": summary, "results": successes}),
             200,
@@ -326,52 +354,62 @@ def import_ics(user):
     """
     data = request.json
     ics_content = data.get("ics")
-    user_settings = Settings.query.filter_by(user_id=user.id).first()
     if not ics_content:
         return jsonify({"message": "No .ics content provided"}), 400
 
+    # Events without a Kanti Koala priority get the lowest (non-exam) priority.
+    # Resolved once up front instead of re-querying the settings for every VEVENT.
+    user_settings = user.settings
+    all_priorities = (
+        [p.priority_level for p in user_settings.priority_settings]
+        if user_settings
+        else []
+    ) or list(DEFAULT_SETTINGS["priority_settings"])
+    lowest_priority = max(all_priorities) + 1
+
     try:
         calendar = icalendar.Calendar.from_ical(ics_content)
 
-        for component in calendar.walk():
-            if component.name == "VEVENT":
-                title = str(component.get("summary"))
-                start = component.get("dtstart").dt
-                end = component.get("dtend").dt if component.get("dtend") else None
-                is_all_day = not isinstance(start, datetime)
-                # Read custom Kanti Koala tags if present
-                priority = component.get("X-KKOALA-PRIORITY")
-                color = component.get("X-KKOALA-COLOR")
-
-                settings = Settings.query.filter_by(user_id=user.id).first()
-
-                if settings and settings.priority_settings:
-                    all_priorities = [p.priority_level for p in settings.priority_settings]
-                    if all_priorities:
-                        # An exam is any priority that is not the maximum (lowest) one
-                        lowest_priority = max(all_priorities) + 1
-
-                if priority is not None:
-                    priority = int(priority)
-                else:
-                    priority = lowest_priority
-                if color is None:
-                    color = DEFAULT_IMPORT_COLOR
-
-                new_event = Event(
-                    title=title,
-                    start=start.isoformat(),
-                    end=end.isoformat() if end else None,
-                    color=color,
-                    user_id=user.id,
-                    priority=priority,
-                    recurrence="None",
-                    recurrence_id="0",
-                    locked=True,
-                    all_day=is_all_day,
-                )
-                db.session.add(new_event)
-
+        rows = []
+        for component in calendar.walk("VEVENT"):
+            title = str(component.get("summary"))
+            start = component.get("dtstart").dt
+            end = component.get("dtend").dt if component.get("dtend") else None
+            is_all_day = not isinstance(start, datetime)
+            # Read custom Kanti Koala tags if present
+            priority = component.get("X-KKOALA-PRIORITY")
+            color = component.get("X-KKOALA-COLOR")
+
+            if priority is not None:
+                priority = int(priority)
+            else:
+                priority = lowest_priority
+            if color is None:
+                color = DEFAULT_IMPORT_COLOR
+
+            rows.append(
+                {
+                    "title": title,
+                    "start": start.isoformat(),
+                    "end": end.isoformat() if end else None,
+                    "color": str(color),
+                    "user_id": user.id,
+                    "priority": priority,
+                    "recurrence": "None",
+                    "recurrence_id": "0",
+                    "locked": True,
+                    "all_day": is_all_day,
+                    "exam_id": None,
+                }
+            )
+            # Insert in bounded executemany batches so huge calendars don't
+            # build one giant parameter list
+            if len(rows) >= IMPORT_BATCH_SIZE:
+                db.session.execute(db.insert(Event), rows)
+                rows = []
+
+        if rows:
+            db.session.execute(db.insert(Event), rows)
         db.session.commit()
         return jsonify({"message": "Events imported successfully"}), 200
     except Exception as e:
@@ -1,11 +1,14 @@
 # Import Flask modules for routing, session management, and request/response handling
 from flask import Blueprint, session, current_app, jsonify, request
 from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+import orjson
 import os
 
 # Import application models and utilities
 from ..models import Subject, Grade, User, Semester
-from ..utils import login_required, csrf_protect
+from ..utils import login_required, csrf_protect, conditional_jsonify, not_modified
 from ..extensions import db
 
 # Define the blueprint for grades-related API routes
@@ -13,6 +16,116 @@ grades_bp = Blueprint(
     "grades", __name__, template_folder="../templates", static_folder="../static"
 )
 
+# Grade book write statements, built once at import and reused for every save;
+# SQLAlchemy's compiled cache then serves their SQL without re-rendering
+_INSERT_RETURNING_ID = {
+    model: db.insert(model).returning(model.id, sort_by_parameter_order=True)
+    for model in (Semester, Subject, Grade)
+}
+_BULK_UPDATE = {model: db.update(model) for model in (Semester, Subject, Grade)}
+
+
+def _insert_returning_ids(model, rows):
+    """
+    Bulk-insert rows into a model's table and return the new primary keys.
+
+    Args:
+        model: The model class to insert into.
+        rows (list): Column dictionaries, one per row.
+
+    Returns:
+        list: The new ids, in the same order as ``rows``.
+    """
+    if not rows:
+        return []
+    result = db.session.execute(_INSERT_RETURNING_ID[model], rows)
+    return result.scalars().all()
+
+
+def _normalize_grade_book(payload):
+    """
+    Validate the posted grade book and coerce it into column values.
+
+    Args:
+        payload (list): Semesters as posted by the grade book page.
+
+    Returns:
+        list: Semesters as dicts with ``name`` and ``subjects``; each subject has
+            ``name``, ``counts_towards_average`` and ``grades`` (Grade column dicts).
+
+    Raises:
+        ValueError: If an entry has the wrong type or a grade value is not numeric.
+    """
+    semesters = []
+    for sem in payload:
+        if not isinstance(sem, dict) or not isinstance(sem.get("name", ""), str):
+            raise ValueError("Invalid semester entry")
+        if "subjects" in sem and not isinstance(sem["subjects"], list):
+            raise ValueError("subjects must be a list")
+        subjects = []
+        for subj in sem.get("subjects", []):
+            if not isinstance(subj, dict) or not isinstance(subj.get("name", ""), str):
+                raise ValueError("Invalid subject entry")
+            if "grades" in subj and not isinstance(subj["grades"], list):
+                raise ValueError("grades must be a list")
+            subjects.append(
+                {
+                    "name": subj.get("name", "Unnamed Subject"),
+                    "counts_towards_average": bool(subj.get("counts_average", True)),
+                    "grades": [
+                        {
+                            "name": grd.get("name", ""),
+                            "value": float(grd.get("value", 0)),
+                            "weight": float(grd.get("weight", 1.0)),
+                            "counts": bool(grd.get("counts", True)),
+                        }
+                        for grd in subj.get("grades", [])
+                    ],
+                }
+            )
+        semesters.append(
+            {"name": sem.get("name", "Unnamed Semester"), "subjects": subjects}
+        )
+    return semesters
+
+
+def _sync_rows(model, groups, stale):
+    """
+    Bring one level of the grade book (semesters, subjects or grades) in line
+    with the payload, matching existing rows to new values by position.
+
+    All changes for the level are batched: one bulk UPDATE for changed rows and
+    one INSERT for new rows, however many parents the level spans.
+
+    Args:
+        model: The model class of this level.
+        groups (list): One (existing_rows, wanted_values) pair per parent, where
+            existing_rows are ordered by id and wanted_values are column dicts.
+        stale (dict): Maps model -> list; existing rows without a counterpart in
+            the payload are appended here for the caller to delete.
+
+    Returns:
+        list: Per group, the ids of the rows that now hold ``wanted_values``.
+    """
+    updates = []
+    inserts = []
+    for existing, wanted in groups:
+        for row, values in zip(existing, wanted):
+            if any(getattr(row, key) != value for key, value in values.items()):
+                updates.append({"id": row.id, **values})
+        stale[model].extend(existing[len(wanted):])
+        inserts.extend(wanted[len(existing):])
+
+    if updates:
+        db.session.execute(_BULK_UPDATE[model], updates)
+    new_ids = iter(_insert_returning_ids(model, inserts))
+
+    return [
+        [row.id for row in existing[: len(wanted)]]
+        + [next(new_ids) for _ in wanted[len(existing):]]
+        for existing, wanted in groups
+    ]
+
 
 @grades_bp.route("/", methods=["GET"])
 @login_required
@@ -23,31 +136,64 @@ def get_noten(user):
     Returns:
         JSON: A nested data structure representing the user's academic records.
     """
-    semesters = Semester.query.filter_by(user_id=user.id).all()
+    # The grade book only changes through save_noten, which bumps the version;
+    # an unchanged book is answered with a 304 without querying it
+    etag = f"{user.id}-{user.grades_version}"
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    # Fetch the whole semester -> subject -> grade tree as plain rows in one
+    # outer-joined query, ordered so each level arrives in contiguous runs
+    rows = db.session.execute(
+        db.select(
+            Semester.id,
+            Semester.name,
+            Subject.id,
+            Subject.name,
+            Subject.counts_towards_average,
+            Grade.id,
+            Grade.name,
+            Grade.value,
+            Grade.weight,
+            Grade.counts,
+        )
+        .outerjoin(Subject, Subject.semester_id == Semester.id)
+        .outerjoin(Grade, Grade.subject_id == Subject.id)
+        .where(Semester.user_id == user.id)
+        .order_by(Semester.id, Subject.id, Grade.id)
+    ).all()
+
+    # Group the flat rows into the nested structure for JSON output; outer-join
+    # rows with a NULL subject/grade stand for an empty semester/subject
     data = []
-    # Structure the database objects into a nested dictionary/list for JSON output
-    for sem in semesters:
-        sem_data = {"id": sem.id, "name": sem.name, "subjects": []}
-        for subj in sem.subjects:
-            subj_data = {
-                "id": subj.id,
-                "name": subj.name,
-                "counts_average": subj.counts_towards_average,
-                "grades": [],
-            }
-            for grade in subj.grades:
-                subj_data["grades"].append(
-                    {
-                        "id": grade.id,
-                        "name": grade.name,
-                        "value": grade.value,
-                        "weight": grade.weight,
-                        "counts": grade.counts,
-                    }
-                )
-            sem_data["subjects"].append(subj_data)
-        data.append(sem_data)
-    return jsonify(data)
+    for (sem_id, sem_name), sem_rows in groupby(rows, key=itemgetter(0, 1)):
+        subjects = []
+        for (subj_id, subj_name, counts_average), subj_rows in groupby(
+            sem_rows, key=itemgetter(2, 3, 4)
+        ):
+            if subj_id is None:
+                continue
+            subjects.append(
+                {
+                    "id": subj_id,
+                    "name": subj_name,
+                    "counts_average": counts_average,
+                    "grades": [
+                        {
+                            "id": row[5],
+                            "name": row[6],
+                            "value": row[7],
+                            "weight": row[8],
+                            "counts": row[9],
+                        }
+                        for row in subj_rows
+                        if row[5] is not None
+                    ],
+                }
+            )
+        data.append({"id": sem_id, "name": sem_name, "subjects": subjects})
+    return conditional_jsonify(data, etag=etag)
 
 
 @grades_bp.route("/", methods=["POST"])
@@ -55,7 +201,10 @@ def get_noten(user):
 @login_required
 def save_noten(user):
     """
-    Replace all semesters/subjects/grades for the current user with the provided payload.
+    Sync all semesters/subjects/grades for the current user to the provided payload.
+
+    Rows are matched to the payload by position, so only rows that actually
+    changed are written (e.g. editing one grade issues a single UPDATE).
 
     Payload format:
     [
@@ -76,73 +225,78 @@ def save_noten(user):
     Returns:
         JSON: Status message and HTTP code.
     """
-    payload = request.get_json(silent=True)
+    # Decode the raw body directly with orjson; cache=False stops Werkzeug from
+    # keeping a second copy of a potentially large grade book on the request
+    try:
+        payload = orjson.loads(request.get_data(cache=False))
+    except orjson.JSONDecodeError:
+        payload = None
     if not isinstance(payload, list):
         return jsonify({"error": "Invalid payload, expected a list of semesters"}), 400
 
-    # Validate payload structure before touching DB
+    # Validate and normalise the payload in one pass before touching DB
     try:
-        for sem in payload:
-            if not isinstance(sem, dict) or not isinstance(sem.get("name", ""), str):
-                raise ValueError("Invalid semester entry")
-            if "subjects" in sem and not isinstance(sem["subjects"], list):
-                raise ValueError("subjects must be a list")
-            for subj in sem.get("subjects", []):
-                if not isinstance(subj, dict) or not isinstance(
-                    subj.get("name", ""), str
-                ):
-                    raise ValueError("Invalid subject entry")
-                if "grades" in subj and not isinstance(subj["grades"], list):
-                    raise ValueError("grades must be a list")
-                for grd in subj.get("grades", []):
-                    # attempt to coerce values to check types
-                    float(grd.get("value", 0))
-                    float(grd.get("weight", 1.0))
+        semesters = _normalize_grade_book(payload)
     except Exception as e:
         return jsonify({"error": f"Invalid payload: {str(e)}"}), 400
 
-    # Now perform DB replace inside a transaction; rollback on error
+    # Now sync the DB to the payload inside a transaction; rollback on error
     try:
-        # Delete existing semesters (cascade should remove subjects/grades)
-        existing_semesters = Semester.query.filter_by(user_id=user.id).all()
-        for s in existing_semesters:
-            db.session.delete(s)
-        db.session.flush()
-
-        # Recreate from payload
-        for sem in payload:
-            sem_name = sem.get("name", "Unnamed Semester")
-            new_sem = Semester(user_id=user.id, name=sem_name)
-            db.session.add(new_sem)
-            db.session.flush()  # ensure new_sem.id available for FK relations
-
-            for subj in sem.get("subjects", []):
-                subj_name = subj.get("name", "Unnamed Subject")
-                counts_avg = subj.get("counts_average", True)
-                new_subj = Subject(
-                    semester_id=new_sem.id,
-                    name=subj_name,
-                    counts_towards_average=bool(counts_avg),
+        existing_sems = (
+            Semester.query.filter_by(user_id=user.id).order_by(Semester.id).all()
+        )
+        stale = {Semester: [], Subject: [], Grade: []}
+
+        # Semesters, subjects and grades are matched to the payload by position;
+        # only changed rows are updated, extra rows deleted, missing rows inserted
+        sem_ids = _sync_rows(
+            Semester,
+            [
+                (
+                    existing_sems,
+                    [{"user_id": user.id, "name": sem["name"]} for sem in semesters],
                 )
-                db.session.add(new_subj)
-                db.session.flush()
-
-                for grd in subj.get("grades", []):
-                    try:
-                        value = float(grd.get("value", 0))
-                        weight = float(grd.get("weight", 1.0))
-                    except Exception:
-                        value = 0.0
-                        weight = 1.0
-                    new_grade = Grade(
-                        subject_id=new_subj.id,
-                        name=grd.get("name", ""),
-                        value=value,
-                        weight=weight,
-                        counts=bool(grd.get("counts", True)),
-                    )
-                    db.session.add(new_grade)
+            ],
+            stale,
+        )[0]
+
+        subject_groups = [
+            (
+                existing_sems[i].subjects if i < len(existing_sems) else [],
+                [
+                    {
+                        "semester_id": sem_id,
+                        "name": subj["name"],
+                        "counts_towards_average": subj["counts_towards_average"],
+                    }
+                    for subj in sem["subjects"]
+                ],
+            )
+            for i, (sem_id, sem) in enumerate(zip(sem_ids, semesters))
+        ]
+        subj_ids = _sync_rows(Subject, subject_groups, stale)
+
+        grade_groups = [
+            (
+                existing_subjects[j].grades if j < len(existing_subjects) else [],
+                [{"subject_id": subj_id, **grd} for grd in subj["grades"]],
+            )
+            for (existing_subjects, _), ids, sem in zip(
+                subject_groups, subj_ids, semesters
+            )
+            for j, (subj_id, subj) in enumerate(zip(ids, sem["subjects"]))
+        ]
+        _sync_rows(Grade, grade_groups, stale)
+
+        # Delete rows no longer in the payload; the database cascades each delete
+        # to the row's subjects/grades (ON DELETE CASCADE)
+        for model in (Grade, Subject, Semester):
+            ids = [row.id for row in stale[model]]
+            if ids:
+                db.session.execute(db.delete(model).where(model.id.in_(ids)))
 
+        # Invalidate cached copies of the grade book (ETag of GET /api/noten)
+        user.grades_version = User.grades_version + 1
         db.session.commit()
         return jsonify({"status": "ok"}), 201
     except Exception as exc:
@@ -1,21 +1,59 @@
-from flask import Blueprint, render_template, session, current_app, abort
+from flask import Blueprint, render_template, session, abort
 from datetime import datetime, timedelta
 import os, json
 
-from ..models import Settings, User, Semester, Event, ToDoCategory
-from ..utils import login_required
+from ..models import User, Semester, Event, ToDoCategory
+from ..utils import login_required, get_current_user
+from ..extensions import db
 
 main_bp = Blueprint(
     "main", __name__, template_folder="../templates", static_folder="../static"
 )
 
+# Directory holding the tip files shipped with the app
+TIPS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "tips")
+
+
+def _load_daily_tips():
+    """
+    Read the daily tips file once.
+
+    Returns:
+        tuple: All tips (one per line), or a fallback tip if the file is missing.
+    """
+    try:
+        with open(os.path.join(TIPS_DIR, "daily_tips.txt"), "r", encoding="utf-8") as file:
+            return tuple(line.strip() for line in file) or ("Keine Tipps verfügbar.",)
+    except FileNotFoundError:
+        return ("Keine Tipps verfügbar.",)
+
+
+def _load_learn_tips():
+    """
+    Read the learning tips shown on the lerntipps page once.
+
+    Returns:
+        dict: Tips per category from learn_tips.json, or an empty dict if the file
+            is missing or not valid JSON (the page then shows that no tips exist).
+    """
+    try:
+        with open(os.path.join(TIPS_DIR, "learn_tips.json"), "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+# The tips never change while the app is running, so load them at import time
+DAILY_TIPS = _load_daily_tips()
+LEARN_TIPS = _load_learn_tips()
+
 
 @main_bp.route("/")
 def index():
     """
     Home route: Handles the main landing page display.
 
-    - Shows a daily tip (from file) for all users.
+    - Shows a daily tip (loaded once at startup) for all users.
     - If logged in, displays dashboard with upcoming exams, today's events, and grade statistics.
     - If not logged in, shows login/register links and the daily tip.
 
@@ -23,23 +61,17 @@ def index():
         str: Rendered HTML template ('home.html').
     """
     # --- Daily Tip Logic (for both logged in and out) ---
-    try:
-        tips_file_path = os.path.join(current_app.root_path, "tips", "daily_tips.txt")
-        with open(tips_file_path, "r", encoding="utf-8") as file:
-            tips = file.readlines()
-    except FileNotFoundError:
-        tips = ["Keine Tipps verfügbar."]
-    tip_of_the_day = tips[datetime.now().timetuple().tm_yday % len(tips)].strip()
+    tip_of_the_day = DAILY_TIPS[datetime.now().timetuple().tm_yday % len(DAILY_TIPS)]
 
     # --- Logged In Dashboard Logic ---
     if "username" in session:
-        user = User.query.filter_by(username=session["username"]).first()
+        user = get_current_user()
         if not user:
             session.clear()
             return render_template("home.html", logged_in=False, tip=tip_of_the_day)
 
         # --- Determine exam priorities from user settings ---
-        settings = Settings.query.filter_by(user_id=user.id).first()
+        settings = user.settings
         exam_priorities = [1]  # Default exam priorities if no settings found
 
         if settings and settings.priority_settings:
@@ -52,41 +84,48 @@ def index():
         # 1. Get upcoming exams (within next 21 days)
         today = datetime.utcnow().date()
         future_date = today + timedelta(days=21)
-        upcoming_exams_query = Event.query.filter(
-            Event.user_id == user.id,
-            Event.priority.in_(exam_priorities),
-            Event.start >= today.isoformat(),
-            Event.start <= future_date.isoformat()
-        ).order_by(Event.start).all()
-
-        # Convert string dates to datetime objects for the template
-        upcoming_exams = []
-        for exam in upcoming_exams_query:
-            if isinstance(exam.start, str):
-                exam.start = datetime.fromisoformat(exam.start)
-            if isinstance(exam.end, str):
-                exam.end = datetime.fromisoformat(exam.end)
-            upcoming_exams.append(exam)
+        upcoming_exams_rows = db.session.execute(
+            db.select(Event.title, Event.start, Event.end)
+            .where(
+                Event.user_id == user.id,
+                Event.priority.in_(exam_priorities),
+                Event.start >= today.isoformat(),
+                Event.start <= future_date.isoformat(),
+            )
+            .order_by(Event.start)
+        ).all()
+
+        # Parse the ISO strings once into plain dicts for the template (assigning
+        # datetimes onto the ORM objects would mark them dirty and get flushed)
+        upcoming_exams = [
+            {
+                "title": title,
+                "start": datetime.fromisoformat(start),
+                "end": datetime.fromisoformat(end) if end else None,
+            }
+            for title, start, end in upcoming_exams_rows
+        ]
 
         # 2. Get today's events
-        todays_events_query = Event.query.filter(
-            Event.user_id == user.id,
-            Event.start.like(f"{today.isoformat()}%")
-        ).order_by(Event.start).all()
+        todays_events_rows = db.session.execute(
+            db.select(Event.title, Event.color, Event.start, Event.end, Event.all_day)
+            .where(
+                Event.user_id == user.id,
+                Event.start.like(f"{today.isoformat()}%"),
+            )
+            .order_by(Event.start)
+        ).all()
 
         todays_events = []
-        for event in todays_events_query:
-            if event.all_day:
-                event.start = datetime.fromisoformat(event.start).date()
-                if event.end:
-                    event.end = datetime.fromisoformat(event.end).date()
-                else:
-                    event.end = event.start
-            if isinstance(event.start, str):
-                event.start = datetime.fromisoformat(event.start)
-            if isinstance(event.end, str):
-                event.end = datetime.fromisoformat(event.end)
-            todays_events.append(event)
+        for title, color, start, end, all_day in todays_events_rows:
+            start = datetime.fromisoformat(start)
+            end = datetime.fromisoformat(end) if end else None
+            if all_day:
+                start = start.date()
+                end = end.date() if end else start
+            todays_events.append(
+                {"title": title, "color": color, "start": start, "end": end}
+            )
 
         # 3. Grade statistics for dashboard
         dashboard_stats = {
@@ -164,9 +203,8 @@ def agenda(user):
     Returns:
         str: Rendered HTML template ('agenda.html').
     """
-    settings = Settings.query.filter_by(user_id=user.id).first()
-    priority_levels = settings.priority_settings
-    priority_levels = sorted(priority_levels, key=lambda x: x.priority_level)
+    settings = user.settings
+    priority_levels = settings.priority_settings  # Ordered by level on load
     return render_template("agenda.html", priority_levels=priority_levels)
 
 
@@ -202,10 +240,7 @@ def lerntipps():
     Returns:
         str: Rendered HTML template ('lerntipps.html').
     """
-    tips_file_path = os.path.join(current_app.root_path, "tips", "learn_tips.json")
-    with open(tips_file_path, "r", encoding="utf-8") as file:
-        tips = json.load(file)
-    return render_template("lerntipps.html", tips=tips)
+    return render_template("lerntipps.html", tips=LEARN_TIPS)
 
 
 @main_bp.route("/about")
@@ -13,7 +13,7 @@ from flask import (
 
 # Import application extensions and models
 from ..extensions import db, bcrypt
-from ..models import User, Event, Settings, PrioritySetting
+from ..models import User, Event, PrioritySetting
 from ..utils import csrf_protect, login_required
 
 # Define the blueprint for settings-related routes
@@ -35,12 +35,17 @@ def settings_view(user):
     Returns:
         str: Rendered HTML template ('settings.html') or a redirect.
     """
-    settings = Settings.query.filter_by(user_id=user.id).first()
+    settings = user.settings
 
     if request.method == "POST":
         # Handle account deletion first as it's a terminal action
         if "delete_account" in request.form:
-            db.session.delete(user)
+            # One DELETE; the database cascades it to all rows the user owns
+            db.session.execute(
+                db.delete(User)
+                .where(User.id == user.id)
+                .execution_options(synchronize_session=False)
+            )
             db.session.commit()
             session.clear()
             return redirect(url_for("main.index"))
@@ -51,12 +56,13 @@ def settings_view(user):
             existing_levels = [p.priority_level for p in settings.priority_settings]
             next_level = max(existing_levels, default=0) + 1
 
-            # Shift all events with current priority >= next_level up by 1
-            user_events = Event.query.filter(
-                Event.user_id == user.id, Event.priority >= next_level
-            ).all()
-            for event in user_events:
-                event.priority += 1
+            # Shift all events with current priority >= next_level up by 1 (one UPDATE)
+            db.session.execute(
+                db.update(Event)
+                .where(Event.user_id == user.id, Event.priority >= next_level)
+                .values(priority=Event.priority + 1)
+                .execution_options(synchronize_session=False)
+            )
 
             # Add the new priority setting with default values
             new_prio = PrioritySetting(
@@ -74,30 +80,33 @@ def settings_view(user):
         # Handle removing a priority level
         elif "remove_priority" in request.form:
             level_to_remove = int(request.form["remove_priority"])
-            prio_setting = PrioritySetting.query.filter_by(
-                settings_id=settings.id, priority_level=level_to_remove
-            ).first()
-            if prio_setting:
-                db.session.delete(prio_setting)
-                # Shift all higher priority levels down by 1
-                higher_prios = (
-                    PrioritySetting.query.filter(
+            removed = db.session.execute(
+                db.delete(PrioritySetting)
+                .where(
+                    PrioritySetting.settings_id == settings.id,
+                    PrioritySetting.priority_level == level_to_remove,
+                )
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if removed:
+                # Shift all higher priority levels down by 1 (one UPDATE)
+                db.session.execute(
+                    db.update(PrioritySetting)
+                    .where(
                         PrioritySetting.settings_id == settings.id,
                         PrioritySetting.priority_level > level_to_remove,
                     )
-                    .order_by(PrioritySetting.priority_level)
-                    .all()
+                    .values(priority_level=PrioritySetting.priority_level - 1)
+                    .execution_options(synchronize_session=False)
                 )
-                for p in higher_prios:
-                    p.priority_level -= 1
-                db.session.commit()
-            
+
             # Shift all user events a priority down, if their priority was above the one deleted
-            user_events = Event.query.filter(
-                Event.user_id == user.id, Event.priority > level_to_remove
-            ).all()
-            for event in user_events:
-                event.priority -= 1
+            db.session.execute(
+                db.update(Event)
+                .where(Event.user_id == user.id, Event.priority > level_to_remove)
+                .values(priority=Event.priority - 1)
+                .execution_options(synchronize_session=False)
+            )
             db.session.commit()
             return redirect(url_for("settings.settings_view"))
 
@@ -147,9 +156,7 @@ def settings_view(user):
         learn_on_saturday=settings.learn_on_saturday,
         learn_on_sunday=settings.learn_on_sunday,
         preferred_learning_time=settings.preferred_learning_time,
-        priority_settings=sorted(
-            settings.priority_settings, key=lambda p: p.priority_level
-        ),  # Ensure list is sorted
+        priority_settings=settings.priority_settings,  # Ordered by level on load
         study_block_color=settings.study_block_color,
         import_color=settings.import_color,
     )
@@ -1,13 +1,42 @@
 # Standard library imports
 from functools import wraps
-from flask import session, redirect, url_for, request, jsonify, current_app
-from datetime import datetime, timedelta, time as dtime, timezone
+from flask import session, redirect, url_for, request, jsonify, current_app, g
+from datetime import datetime, timedelta, timezone
 import secrets
 from dateutil import parser
+from dateutil.relativedelta import relativedelta
+from flask.json.provider import DefaultJSONProvider
+import orjson
 
 # Application-specific imports
-from .consts import DAY_START
 from .models import User  # Import the User model for authentication
+from .extensions import db
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson.
+
+    Used for jsonify() responses and request.get_json() parsing. orjson encodes
+    and decodes in C, which is several times faster than the stdlib json module
+    for the event and grade payloads. Types orjson can't handle natively fall
+    back to Flask's default serializer.
+    """
+
+    # Responses are built from dicts with a fixed insertion order, so sorting
+    # keys only costs time (the output, and therefore ETags, stay stable)
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 
 def str_to_bool(val):
@@ -27,6 +56,40 @@ def str_to_bool(val):
     return False
 
 
+def get_current_user():
+    """
+    Return the logged-in user for the current request.
+
+    The lookup runs at most once per request, by primary key (served from the
+    session's identity map when the user is already loaded), and is checked
+    against the session's username; the result (or None if nobody is logged
+    in) is cached on flask.g for the decorators, views and context processors
+    that need it afterwards.
+
+    Returns:
+        User | None: The logged-in user, or None.
+    """
+    if "user" not in g:
+        user_id = session.get("user_id")
+        username = session.get("username")
+        if user_id is not None:
+            g.user = db.session.get(User, user_id)
+            # SQLite can reuse a deleted user's id; a session whose username no
+            # longer matches that id belongs to a deleted account, so log it out
+            if g.user and g.user.username != username:
+                g.user = None
+                session.pop("user_id", None)
+                session.pop("username", None)
+        elif username:
+            # Session from before user_id was stored: resolve once, then remember the id
+            g.user = User.query.filter_by(username=username).first()
+            if g.user:
+                session["user_id"] = g.user.id
+        else:
+            g.user = None
+    return g.user
+
+
 def login_required(f):
     """
     Decorator to ensure a user is logged in and exists in the database.
@@ -50,7 +113,7 @@ def login_required(f):
                 return jsonify({"error": "Unauthorized: Not logged in"}), 401
             return redirect(url_for("auth.login"))
 
-        user = User.query.filter_by(username=username).first()
+        user = get_current_user()
         if not user:
             # Handle case where user is in session but not in DB
             if request.path.startswith("/api/"):
@@ -63,6 +126,51 @@ def login_required(f):
     return decorated_function
 
 
+def conditional_jsonify(payload, etag=None):
+    """
+    Build a JSON response that supports conditional GETs.
+
+    The response carries an ETag (derived from its body unless one is given)
+    and is marked `private, no-cache`, so browsers revalidate on every load and
+    receive an empty 304 Not Modified instead of the full payload when nothing
+    changed.
+
+    Args:
+        payload: JSON-serialisable data.
+        etag (str, optional): Weak ETag to use instead of hashing the body.
+
+    Returns:
+        Response: A 200 JSON response, or a 304 if the client's ETag matches.
+    """
+    response = jsonify(payload)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    if etag:
+        response.set_etag(etag, weak=True)
+    else:
+        response.add_etag()
+    return response.make_conditional(request)
+
+
+def not_modified(etag):
+    """
+    Answer a conditional GET before doing any work, if the client is up to date.
+
+    Args:
+        etag (str): The weak ETag the full response would carry.
+
+    Returns:
+        Response | None: An empty 304 response, or None if the payload must be built.
+    """
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = current_app.response_class(status=304)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.set_etag(etag, weak=True)
+    return response
+
+
 def csrf_protect(f):
     """
     Decorator to protect a route from CSRF attacks.
@@ -111,6 +219,31 @@ def make_csrf_token():
         session["csrf_token"] = secrets.token_hex(16)
 
 
+# Distance between consecutive instances of each recurrence pattern
+RECURRENCE_STEPS = {
+    "daily": timedelta(days=1),
+    "weekly": timedelta(weeks=1),
+    "monthly": relativedelta(months=1),
+}
+
+
+def recurrence_step(pattern):
+    """
+    Step between consecutive instances of a recurring series.
+
+    Shared by event creation and series updates so both place instances on the
+    same dates: the index-th instance is ``first + step * index``. Monthly series
+    step by calendar months, not by 4-week blocks.
+
+    Args:
+        pattern (str): Recurrence pattern ('daily', 'weekly' or 'monthly').
+
+    Returns:
+        timedelta | relativedelta | None: The step, or None for an unsupported pattern.
+    """
+    return RECURRENCE_STEPS.get(pattern)
+
+
 def to_dt(iso_or_dt) -> datetime:
     """
     Robustly convert an ISO string or a datetime object to a timezone-aware UTC datetime.
@@ -167,52 +300,38 @@ def to_iso(dt: datetime) -> str:
     return dt.isoformat().replace("+00:00", "Z")
 
 
-def free_slots(events, day):
+def free_slots(day_events, day_start, day_end):
     """
     Calculates free time slots for a given day, respecting existing events
     and applying a 30-minute margin (buffer) around them.
 
     Args:
-        events (list): List of event objects with start/end attributes.
-        day (date): The day for which to calculate free slots.
+        day_events (list): (start_datetime, end_datetime, event) tuples for the events
+            on that day, sorted by start and already parsed to UTC datetimes (see to_dt).
+        day_start (datetime): Start of the usable day (UTC).
+        day_end (datetime): End of the usable day (UTC).
 
     Returns:
         list: List of (start_datetime, end_datetime) tuples representing free slots.
     """
-    from zoneinfo import ZoneInfo
-
-    DAY_END = dtime(22, 0)
-    USER_TZ = ZoneInfo("Europe/Zurich")  # Define user timezone
-
-    # Filter events for the given day and sort by start time
-    events_today = [event for event in events if to_dt(event.start).date() == day]
-    events_today.sort(key=lambda event: to_dt(event.start))
-
+    buffer = timedelta(minutes=30)
     free_slots = []
+    current_start = day_start
 
-    # Convert local DAY_START to UTC
-    naive_day_start = datetime.combine(day, DAY_START)
-    current_start = naive_day_start.replace(tzinfo=USER_TZ).astimezone(timezone.utc)
-
-    for event in events_today:
-        event_start = to_dt(event.start)
-        event_end = to_dt(event.end) if event.end else to_dt(event_start)
+    for event_start, event_end, event in day_events:
+        event_end = event_end or event_start
         if event.all_day:
             return []  # No free slots if there's an all-day event
 
         # Add free slot before the event, with 30 min buffer
-        if current_start <= event_start - timedelta(minutes=30):
-            free_slots.append((current_start, event_start - timedelta(minutes=30)))
+        if current_start <= event_start - buffer:
+            free_slots.append((current_start, event_start - buffer))
 
         # Move current_start to after this event (with 30 min buffer)
-        current_start = max(current_start, event_end + timedelta(minutes=30))
-
-    # Convert local DAY_END to UTC
-    naive_day_end = datetime.combine(day, DAY_END)
-    day_end_dt = naive_day_end.replace(tzinfo=USER_TZ).astimezone(timezone.utc)
+        current_start = max(current_start, event_end + buffer)
 
     # Add final free slot if any time remains after last event
-    if current_start <= day_end_dt:
-        free_slots.append((current_start, day_end_dt))
+    if current_start <= day_end:
+        free_slots.append((current_start, day_end))
 
     return free_slots
@@ -97,6 +97,16 @@ def run_migrations_online():
     connectable = get_engine()
 
     with connectable.connect() as connection:
+        # The app's connect listener enables SQLite foreign keys on every pooled
+        # connection, this one included. Batch migrations rebuild tables by
+        # dropping and recreating them, which must not be checked (or cascaded)
+        # against the foreign keys. The pragma is ignored inside a transaction,
+        # so it is switched off and committed before the migrations begin.
+        sqlite = connection.dialect.name == 'sqlite'
+        if sqlite:
+            connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+            connection.commit()
+
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
@@ -106,6 +116,11 @@ def run_migrations_online():
         with context.begin_transaction():
             context.run_migrations()
 
+        if sqlite:
+            # Hand the connection back to the pool with enforcement restored
+            connection.exec_driver_sql('PRAGMA foreign_keys=ON')
+            connection.commit()
+
 
 if context.is_offline_mode():
     run_migrations_offline()
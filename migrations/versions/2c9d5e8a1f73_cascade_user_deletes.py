@@ -0,0 +1,87 @@
+"""cascade deletes from user to all owned rows
+
+Revision ID: 2c9d5e8a1f73
+Revises: f41b7a2d9e60
+Create Date: 2026-10-16 13:24:51.608342
+
+"""
+from contextlib import contextmanager
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c9d5e8a1f73'
+down_revision = 'f41b7a2d9e60'
+branch_labels = None
+depends_on = None
+
+# These foreign keys were created unnamed. SQLite batch mode names the reflected
+# constraints with this convention; PostgreSQL already gave them its default
+# "<table>_<column>_fkey" names.
+naming_convention = {
+    "fk": "%(table_name)s_%(column_0_name)s_fkey",
+}
+
+# (table, column, referred table, ON UPDATE action)
+foreign_keys = [
+    ('event', 'user_id', 'user', 'CASCADE'),
+    ('settings', 'user_id', 'user', None),
+    ('priority_setting', 'settings_id', 'settings', None),
+    ('semester', 'user_id', 'user', None),
+    ('to_do_category', 'user_id', 'user', None),
+    ('to_do_item', 'category_id', 'to_do_category', None),
+]
+
+
+@contextmanager
+def _sqlite_foreign_keys_off():
+    """
+    Suspend SQLite foreign key enforcement around batch table rebuilds.
+
+    Batch mode copies each table into _alembic_tmp_<table>, drops the original
+    and renames the copy. With enforcement on, dropping a referenced table fails
+    (or, where a child key is already ON DELETE CASCADE, silently deletes the
+    child rows). The pragma is a no-op inside a transaction, so it runs in an
+    autocommit block; the previous setting is restored afterwards.
+    """
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        yield
+        return
+    with op.get_context().autocommit_block():
+        enabled = bind.exec_driver_sql('PRAGMA foreign_keys').scalar()
+        op.execute('PRAGMA foreign_keys=OFF')
+    yield
+    if enabled:
+        with op.get_context().autocommit_block():
+            op.execute('PRAGMA foreign_keys=ON')
+
+
+def _replace_fk(table, column, referred, ondelete, onupdate):
+    if op.get_bind().dialect.name == 'sqlite':
+        # Left behind by a rebuild that failed part way (SQLite DDL isn't rolled back)
+        op.execute(f'DROP TABLE IF EXISTS _alembic_tmp_{table}')
+    with op.batch_alter_table(table, schema=None, naming_convention=naming_convention) as batch_op:
+        batch_op.drop_constraint(f'{table}_{column}_fkey', type_='foreignkey')
+        batch_op.create_foreign_key(
+            f'{table}_{column}_fkey',
+            referred,
+            [column],
+            ['id'],
+            ondelete=ondelete,
+            onupdate=onupdate,
+        )
+
+
+def upgrade():
+    with _sqlite_foreign_keys_off():
+        for table, column, referred, onupdate in foreign_keys:
+            _replace_fk(table, column, referred, 'CASCADE', onupdate)
+
+
+def downgrade():
+    with _sqlite_foreign_keys_off():
+        for table, column, referred, onupdate in reversed(foreign_keys):
+            _replace_fk(table, column, referred, None, onupdate)
@@ -0,0 +1,72 @@
+"""cascade deletes from semester to subjects and grades
+
+Revision ID: 8e3c61f0b9d5
+Revises: d27a4f9e3c18
+Create Date: 2026-10-16 12:21:08.574113
+
+"""
+from contextlib import contextmanager
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e3c61f0b9d5'
+down_revision = 'd27a4f9e3c18'
+branch_labels = None
+depends_on = None
+
+# The grade book tables were created with unnamed foreign keys. SQLite batch mode
+# names the reflected constraints with this convention; PostgreSQL already gave
+# them its default "<table>_<column>_fkey" names.
+naming_convention = {
+    "fk": "%(table_name)s_%(column_0_name)s_fkey",
+}
+
+
+@contextmanager
+def _sqlite_foreign_keys_off():
+    """
+    Suspend SQLite foreign key enforcement around batch table rebuilds.
+
+    Batch mode copies each table into _alembic_tmp_<table>, drops the original
+    and renames the copy. With enforcement on, dropping a referenced table fails
+    (or, where a child key is already ON DELETE CASCADE, silently deletes the
+    child rows). The pragma is a no-op inside a transaction, so it runs in an
+    autocommit block; the previous setting is restored afterwards.
+    """
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        yield
+        return
+    with op.get_context().autocommit_block():
+        enabled = bind.exec_driver_sql('PRAGMA foreign_keys').scalar()
+        op.execute('PRAGMA foreign_keys=OFF')
+    yield
+    if enabled:
+        with op.get_context().autocommit_block():
+            op.execute('PRAGMA foreign_keys=ON')
+
+
+def _replace_fk(table, column, referred, ondelete):
+    if op.get_bind().dialect.name == 'sqlite':
+        # Left behind by a rebuild that failed part way (SQLite DDL isn't rolled back)
+        op.execute(f'DROP TABLE IF EXISTS _alembic_tmp_{table}')
+    with op.batch_alter_table(table, schema=None, naming_convention=naming_convention) as batch_op:
+        batch_op.drop_constraint(f'{table}_{column}_fkey', type_='foreignkey')
+        batch_op.create_foreign_key(
+            f'{table}_{column}_fkey', referred, [column], ['id'], ondelete=ondelete
+        )
+
+
+def upgrade():
+    with _sqlite_foreign_keys_off():
+        _replace_fk('subject', 'semester_id', 'semester', 'CASCADE')
+        _replace_fk('grade', 'subject_id', 'subject', 'CASCADE')
+
+
+def downgrade():
+    with _sqlite_foreign_keys_off():
+        _replace_fk('grade', 'subject_id', 'subject', None)
+        _replace_fk('subject', 'semester_id', 'semester', None)
@@ -0,0 +1,38 @@
+"""add event (user_id, priority) index
+
+Revision ID: f41b7a2d9e60
+Revises: 8e3c61f0b9d5
+Create Date: 2026-10-16 12:58:34.190827
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f41b7a2d9e60'
+down_revision = '8e3c61f0b9d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Build the index without locking the event table for writes on PostgreSQL
+    # (CONCURRENTLY can't run inside a transaction); SQLite ignores the option
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_event_user_priority',
+            'event',
+            ['user_id', 'priority'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_event_user_priority',
+            table_name='event',
+            postgresql_concurrently=True,
+        )